@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zlib
+from datetime import datetime
+
+from mock_server import MockPublishingServer
+from publishing import PublishingProcessor
+
+
+class Benchmark:
+    # Drives PublishingProcessor against a local MockPublishingServer in a temporary working directory
+    def __init__(self, options):
+        self.options = options
+        self.server = MockPublishingServer(latency=options.latency,
+                                           bandwidth=options.bandwidth * 1024 * 1024 if options.bandwidth else None,
+                                           error_rate=options.error_rate, seed=options.seed)
+        self.files = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files')
+        self.directory = None
+        self.results = dict()
+
+    def __enter__(self):
+        self.server.start()
+        self.directory = tempfile.mkdtemp(prefix='publishing-benchmark-')
+        os.chdir(self.directory)
+        for folder in ['files', 'packages']:
+            os.mkdir(folder)
+        for filename in ['unity-icon.png', 'unity-card.png', 'unity-cover.png', 'unity-social-media.png',
+                         'unity-screenshot.png']:
+            shutil.copy(os.path.join(self.files, filename), 'files')
+        with open('config.json', 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'host': self.server.url,
+                'username': 'benchmark',
+                'password': 'benchmark',
+                'backoff': 0.01
+            }, indent=4))
+        return self
+
+    def __exit__(self, *args):
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.server.stop()
+
+    @staticmethod
+    def create_unitypackage(path, size):
+        # Valid gzip stream of stored blocks of about the given size, so it passes the check before upload while
+        # multi-GB unitypackages are created at disk speed
+        compressor = zlib.compressobj(0, wbits=31)
+        block = bytes(1024 * 1024)
+        with open(path, 'wb') as f:
+            while f.tell() < size - len(block):
+                f.write(compressor.compress(block))
+            f.write(compressor.compress(block[:max(size - f.tell() - 64, 0)]))
+            f.write(compressor.flush())
+
+    @staticmethod
+    def create_package(name, unitypackage=None):
+        package = {
+            'versionName': '1.0.0',
+            'price': 4.99,
+            'category': 'Tools/Utilities',
+            'metadatas': {
+                'en_US': {
+                    'name': name,
+                    'releaseNotes': 'Benchmark.',
+                    'summary': 'Benchmark package.',
+                    'technicalDetails': 'Benchmark package.',
+                    'description': 'Benchmark package.',
+                    'compatibilityInfo': 'Benchmark package.'
+                }
+            },
+            'tags': ['Benchmark', 'OpenAPI', 'Example'],
+            'artworks': [
+                {'type': 'youtube', 'source': 'https://www.youtube.com/watch?v=efGqe1j3RNk'},
+                {'type': 'screenshot', 'source': 'files/unity-screenshot.png'}
+            ],
+            'keyImages': {
+                'icon': 'files/unity-icon.png',
+                'card': 'files/unity-card.png',
+                'cover': 'files/unity-cover.png',
+                'social_media': 'files/unity-social-media.png'
+            },
+            'unitypackages': {
+                '2020.1.0f1': None if unitypackage is None else {
+                    'source': unitypackage,
+                    'threads': 8,
+                    'srps': [],
+                    'dependencies': []
+                }
+            }
+        }
+        with open(f'packages/{name}.json', 'w', encoding='utf-8') as f:
+            f.write(json.dumps(package, indent=4))
+
+    @staticmethod
+    def arguments(action, **kwargs):
+        return argparse.Namespace(**{
+            'action': action, 'name': None, 'version': None, 'package': None, 'packages': None, 'discount': None,
+            'duration': None, 'jobs': 1, 'incremental': False, 'metrics': False, **kwargs
+        })
+
+    def measure(self, scenario, amount, unit, function, *args):
+        calls = self.server.calls['apiCalls']
+        start_time = datetime.now()
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            try:
+                function(*args)
+                failed = False
+            except Exception as e:
+                print(f'Failed with {e!r}.')
+                failed = True
+        seconds = (datetime.now() - start_time).total_seconds()
+        self.results[scenario] = {
+            'seconds': seconds,
+            'throughput': amount / max(seconds, 1e-6),
+            'unit': unit,
+            'requests': self.server.calls['apiCalls'] - calls,
+            'failed': failed
+        }
+        if failed:
+            sys.stderr.write(output.getvalue()[-4000:])
+        print(f'{scenario}: {seconds:.2f}s, {amount / max(seconds, 1e-6):.2f} {unit}, '
+              f'{self.results[scenario]["requests"]} requests{", FAILED" if failed else ""}.')
+
+    def processor(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor = PublishingProcessor()
+            processor.auth()
+        return processor
+
+    def run(self):
+        options = self.options
+        # Read-only action in a new process, dominated by startup
+        self.measure('limit cli', 1, 'runs/s', functools.partial(
+            subprocess.run, [sys.executable, os.path.join(os.path.dirname(self.files), 'publishing.py'),
+                             '--action', 'limit'], stdout=subprocess.DEVNULL, check=True))
+
+        # Unitypackage upload
+        size = options.unitypackage_size * 1024 * 1024
+        self.create_unitypackage('files/upload.unitypackage', size)
+        processor = self.processor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor.package_version = processor.post(
+                url=f'{processor.host}/store-publishing/package',
+                json={'name': 'Upload', 'category': 'Tools/Utilities'},
+                headers=processor.publishing_headers
+            ).json()['versions'][0]
+        self.measure('upload_unitypackage', size / 1024 / 1024, 'MB/s', processor.upload_unitypackage,
+                     '2020.1.0f1', 'files/upload.unitypackage', None, options.threads)
+        self.measure('upload_unitypackage auto', size / 1024 / 1024, 'MB/s', processor.upload_unitypackage,
+                     '2020.1.0f1', 'files/upload.unitypackage', 'auto', 'auto')
+        os.remove('files/upload.unitypackage')
+
+        # Save of one package with media and unitypackage
+        self.create_unitypackage('files/save.unitypackage', options.save_size * 1024 * 1024)
+        self.create_package('save', 'files/save.unitypackage')
+        self.measure('save', 1, 'packages/s', self.processor().execute, self.arguments('save', name='save'))
+        self.measure('save unchanged', 1, 'packages/s', self.processor().execute,
+                     self.arguments('save', name='save', incremental=True))
+        os.remove('packages/save.json')
+
+        # Save of many packages with media only
+        for index in range(options.packages):
+            self.create_package(f'package-{index:04d}')
+        self.measure('saveall', options.packages, 'packages/s', self.processor().execute,
+                     self.arguments('saveall', jobs=options.jobs))
+        self.measure('saveall unchanged', options.packages, 'packages/s', self.processor().execute,
+                     self.arguments('saveall', jobs=options.jobs, incremental=True))
+
+    def compare(self, baseline, tolerance):
+        regressions = []
+        for scenario, result in self.results.items():
+            if scenario in baseline and result['seconds'] > baseline[scenario]['seconds'] * (1 + tolerance):
+                regressions.append(f'{scenario}: {result["seconds"]:.2f}s, '
+                                   f'baseline {baseline[scenario]["seconds"]:.2f}s')
+            if result['failed'] and not baseline.get(scenario, dict()).get('failed', False):
+                regressions.append(f'{scenario}: failed')
+        return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packages', type=int, default=200, dest='packages',
+                        help='Number of package jsons saved by "saveall".')
+    parser.add_argument('--jobs', type=int, default=8, dest='jobs', help='Argument "--jobs" of "saveall".')
+    parser.add_argument('--unitypackage-size', type=int, default=2048, dest='unitypackage_size',
+                        help='Size in MB of the unitypackage uploaded by "upload_unitypackage".')
+    parser.add_argument('--save-size', type=int, default=256, dest='save_size',
+                        help='Size in MB of the unitypackage uploaded by "save".')
+    parser.add_argument('--threads', type=int, default=8, dest='threads',
+                        help='Threads of "upload_unitypackage".')
+    parser.add_argument('--latency', type=float, default=0.05, dest='latency',
+                        help='Seconds added to each request by the mock server.')
+    parser.add_argument('--bandwidth', type=float, default=None, dest='bandwidth',
+                        help='Upload bandwidth in MB/s of the mock server.')
+    parser.add_argument('--error-rate', type=float, default=0.0, dest='error_rate',
+                        help='Probability of status code 503 from the mock server.')
+    parser.add_argument('--seed', type=int, default=0, dest='seed', help='Seed of injected errors.')
+    parser.add_argument('--output', type=str, default=None, dest='output', help='Write results to this json file.')
+    parser.add_argument('--baseline', type=str, default=None, dest='baseline',
+                        help='Compare results to this json file written by "--output".')
+    parser.add_argument('--tolerance', type=float, default=0.2, dest='tolerance',
+                        help='Allowed slowdown compared to the baseline.')
+    options = parser.parse_args()
+
+    if options.output is not None:
+        options.output = os.path.abspath(options.output)
+    if options.baseline is not None:
+        with open(options.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.loads(f.read())
+    with Benchmark(options) as benchmark:
+        benchmark.run()
+    if options.output is not None:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(benchmark.results, indent=4))
+    if options.baseline is not None:
+        regressions = benchmark.compare(baseline, options.tolerance)
+        for regression in regressions:
+            print(f'Regression of {regression}.')
+        if len(regressions) > 0:
+            sys.exit(1)
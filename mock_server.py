@@ -0,0 +1,330 @@
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs
+
+
+class MockPublishingServer:
+    # Local stand-in of the Publishing API implementing the endpoints used by publishing.py, with configurable
+    # latency per request, a bandwidth cap shared by all uploads and random 503 responses
+    categories = [
+        {'name': '3D', 'children': [{'name': 'Characters'}, {'name': 'Environments'}, {'name': 'Props'}]},
+        {'name': 'Audio', 'children': [{'name': 'Ambient'}, {'name': 'Music'}, {'name': 'Sound FX'}]},
+        {'name': 'Tools', 'children': [{'name': 'Utilities'}, {'name': 'Integration'}]}
+    ]
+    unity_versions = ['2018.4.0f1', '2019.4.0f1', '2020.1.0f1', '2020.3.0f1', '2021.3.0f1']
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, bandwidth=None, error_rate=0.0, seed=None,
+                 limit=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.limit = {
+            'maxApiCallsPerDay': 100000,
+            'unitypackageUploadThreads': 8,
+            'packageCreationsTotal': 10000,
+            'packageCreationsPerDay': 1000,
+            'submissionsAndDeletionsTotal': 10000,
+            'submissionsAndDeletionsPerDay': 1000,
+            **(limit or dict())
+        }
+        self.calls = {'apiCalls': 0, 'packageCreations': 0, 'submissionsAndDeletions': 0}
+        self.packages = dict()
+        self.package_versions = dict()
+        self.uploads = dict()
+        self.private_key = None
+        self.ids = itertools.count(1000)
+        self.lock = Lock()
+        self.link_lock = Lock()
+        self.link_available = 0.0
+        self.received = 0
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.server.server_address[0]}:{self.server.server_address[1]}'
+
+    def start(self):
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def throttle(self, size):
+        # All request bodies share one link of the given bandwidth, served in arrival order
+        if self.bandwidth is None:
+            return
+        with self.link_lock:
+            start = max(time.time(), self.link_available)
+            self.link_available = start + size / self.bandwidth
+        time.sleep(max(self.link_available - time.time(), 0))
+
+    def remaining_limit(self):
+        return {
+            **self.limit,
+            'remainingApiCallsToday': self.limit['maxApiCallsPerDay'] - self.calls['apiCalls'],
+            'remainingUnitypackageUploadThreads': self.limit['unitypackageUploadThreads'],
+            'remainingPackageCreationsTotal': self.limit['packageCreationsTotal'] - self.calls['packageCreations'],
+            'remainingPackageCreationsToday': self.limit['packageCreationsPerDay'] - self.calls['packageCreations'],
+            'remainingSubmissionsAndDeletionsTotal':
+                self.limit['submissionsAndDeletionsTotal'] - self.calls['submissionsAndDeletions'],
+            'remainingSubmissionsAndDeletionsToday':
+                self.limit['submissionsAndDeletionsPerDay'] - self.calls['submissionsAndDeletions']
+        }
+
+    def generate_private_key(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        if self.private_key is None:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            self.private_key = ''.join(key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            ).decode('ascii').strip().splitlines()[1:-1])
+        return self.private_key
+
+    def create_package_version(self, package_id):
+        package_version = {
+            'id': next(self.ids),
+            'packageId': package_id,
+            'status': 'draft',
+            'versionName': None,
+            'price': None,
+            'category': self.packages[package_id]['category'],
+            'metadatas': {'en_US': {'name': self.packages[package_id]['name']}},
+            'tags': [],
+            'artworks': [],
+            'keyImages': {'icon': None, 'card': None, 'cover': None, 'social_media': None},
+            'unitypackages': dict()
+        }
+        self.package_versions[package_version['id']] = package_version
+        self.packages[package_id]['versions'].append(package_version['id'])
+        return package_version
+
+    def package(self, package_id):
+        package = self.packages[package_id]
+        return {
+            **{key: value for key, value in package.items() if key != 'versions'},
+            'versions': [{'id': package_version_id, 'status': self.package_versions[package_version_id]['status']}
+                         for package_version_id in package['versions']]
+        }
+
+    def route(self, method, path, fields, body):
+        # Returns status code and json content of a request, state changes are made under the server lock
+        if method == 'POST' and path == '/api/login':
+            return 200, {'userId': 1, 'publisherId': 1, 'accessToken': uuid.uuid4().hex}
+        if method == 'POST' and path == '/api/publishing-key':
+            return 200, {'id': 1, 'keyChainId': 1, 'privateKey': self.generate_private_key()}
+        if method == 'GET' and path == '/api/publishing-limit':
+            return 200, self.remaining_limit()
+        if method == 'GET' and path == '/store-publishing/fetch/categories':
+            return 200, self.categories
+        if method == 'GET' and path == '/store-publishing/fetch/unity-versions':
+            return 200, self.unity_versions
+        if method == 'POST' and path == '/store-publishing/promotion/launch':
+            return 200, {'packageIds': body.get('packageIds')}
+        if method == 'POST' and path == '/store-publishing/package':
+            self.calls['packageCreations'] += 1
+            package = {'id': next(self.ids), 'name': body['name'], 'category': body['category'], 'versions': []}
+            self.packages[package['id']] = package
+            self.create_package_version(package['id'])
+            return 200, self.package(package['id'])
+        match = re.fullmatch(r'/store-publishing/package/(\d+)(/deprecate)?', path)
+        if match is not None:
+            if int(match[1]) not in self.packages:
+                return 404, {'message': f'Package {match[1]} not found.'}
+            if method == 'GET' and match[2] is None:
+                return 200, self.package(int(match[1]))
+            if method == 'DELETE' and match[2] is not None:
+                self.calls['submissionsAndDeletions'] += 1
+                self.packages[int(match[1])]['deprecated'] = True
+                return 204, None
+        if method == 'POST' and path == '/store-publishing/package-version':
+            if any(self.package_versions[package_version_id]['status'] == 'draft'
+                   for package_version_id in self.packages[int(body['packageId'])]['versions']):
+                return 400, {'message': 'Draft version already exists.'}
+            return 200, self.create_package_version(int(body['packageId']))
+        match = re.fullmatch(r'/store-publishing/package-version/(\d+)(/.*)?', path)
+        if match is None:
+            return 404, {'message': f'Unknown endpoint {method} {path}.'}
+        package_version = self.package_versions.get(int(match[1]))
+        if package_version is None:
+            return 404, {'message': f'Package version {match[1]} not found.'}
+        action = match[2] or ''
+        if method == 'GET' and action == '':
+            return 200, package_version
+        if method == 'DELETE' and action == '':
+            self.calls['submissionsAndDeletions'] += 1
+            del self.package_versions[package_version['id']]
+            self.packages[package_version['packageId']]['versions'].remove(package_version['id'])
+            return 204, None
+        if package_version['status'] != 'draft':
+            return 400, {'message': f'Package version {package_version["id"]} is not a draft.'}
+        if method == 'PUT' and action == '':
+            for field, value in body.items():
+                if field in {'metadatas', 'keyImages'}:
+                    package_version[field].update(value)
+                elif field == 'unitypackages':
+                    for unity_version, unitypackage in value.items():
+                        if unitypackage is None:
+                            package_version['unitypackages'].pop(unity_version, None)
+                        elif unity_version in package_version['unitypackages']:
+                            package_version['unitypackages'][unity_version].update(unitypackage)
+                else:
+                    package_version[field] = value
+            return 200, package_version
+        if method == 'POST' and re.fullmatch(r'/(screenshot|audio|video)', action):
+            package_version['artworks'].append({
+                'id': next(self.ids), 'type': action[1:], 'uri': f'/artworks/{fields.get("file", "")}'
+            })
+            return 200, package_version
+        if method == 'POST' and action.startswith('/media/'):
+            package_version['artworks'].append({'id': next(self.ids), 'type': action[7:], 'uri': fields.get('url')})
+            return 200, package_version
+        if method == 'POST' and action.startswith('/keyimage/'):
+            package_version['keyImages'][action[10:].replace('-', '_')] = f'/keyimages/{next(self.ids)}'
+            return 200, package_version
+        if method == 'POST' and action == '/unitypackage/prepare':
+            self.uploads[(package_version['id'], body['unityVersion'])] = {'sizes': body['sizes'], 'slices': set()}
+            return 200, {'sizes': body['sizes']}
+        if method == 'POST' and action == '/unitypackage':
+            upload = self.uploads.get((package_version['id'], fields.get('unityVersion')))
+            index = int(fields.get('index', -1))
+            if upload is None or not 0 <= index < len(upload['sizes']):
+                return 400, {'message': 'Unitypackage upload is not prepared.'}
+            if fields.get('size') != upload['sizes'][index]:
+                return 400, {'message': f'Slice {index} has {fields.get("size")} bytes, '
+                                        f'{upload["sizes"][index]} expected.'}
+            upload['slices'].add(index)
+            if len(upload['slices']) == len(upload['sizes']):
+                package_version['unitypackages'][fields['unityVersion']] = {
+                    'size': str(sum(upload['sizes'])), 'srps': [], 'dependencies': []
+                }
+            return 200, package_version
+        if method == 'POST' and action == '/submit':
+            self.calls['submissionsAndDeletions'] += 1
+            package_version['status'] = 'submitted'
+            return 200, package_version
+        return 404, {'message': f'Unknown endpoint {method} {path}.'}
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def read_body(self):
+                # Bodies are read in chunks under the bandwidth cap, only the form fields of multipart bodies
+                # are kept so that large slices never stay in memory
+                length = int(self.headers.get('Content-Length') or 0)
+                content_type = self.headers.get('Content-Type', '')
+                kept = 65536 if content_type.startswith('multipart/form-data') else length
+                head, remaining = b'', length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    server.throttle(len(chunk))
+                    if len(head) < kept:
+                        head += chunk[:kept - len(head)]
+                    remaining -= len(chunk)
+                with server.lock:
+                    server.received += length
+                if content_type.startswith('application/json'):
+                    return dict(), json.loads(head.decode('utf-8') or 'null') or dict()
+                if content_type.startswith('application/x-www-form-urlencoded'):
+                    return {key: values[0] for key, values in parse_qs(head.decode('utf-8')).items()}, dict()
+                if content_type.startswith('multipart/form-data'):
+                    boundary = content_type.split('boundary=', 1)[1].strip('"').encode('ascii')
+                    fields = dict()
+                    for part in head.split(b'--' + boundary)[1:]:
+                        headers, _, value = part.partition(b'\r\n\r\n')
+                        name = re.search(rb'name="([^"]*)"', headers)
+                        filename = re.search(rb'filename="([^"]*)"', headers)
+                        if name is None:
+                            continue
+                        if filename is not None:
+                            # The file is the last part, its size follows from the length of the whole body
+                            offset = head.index(part) + len(headers) + 4
+                            fields[name[1].decode()] = filename[1].decode()
+                            fields['size'] = length - offset - len(b'\r\n--' + boundary + b'--\r\n')
+                            break
+                        fields[name[1].decode()] = value[:-2].decode('utf-8')
+                    return fields, dict()
+                return dict(), dict()
+
+            def respond(self, status, content):
+                data = b'' if content is None else json.dumps(content, ensure_ascii=False).encode('utf-8')
+                etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                if self.command == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, data = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if self.command == 'GET' and status in (200, 304):
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def handle_request(self):
+                fields, body = self.read_body()
+                if server.latency > 0:
+                    time.sleep(server.latency)
+                path = self.path.split('?', 1)[0]
+                if not path.startswith('/api/login') and self.headers.get('Authorization') is None:
+                    return self.respond(401, {'message': 'Unauthorized.'})
+                with server.lock:
+                    server.calls['apiCalls'] += 1
+                    if server.error_rate > 0 and server.random.random() < server.error_rate:
+                        status, content = 503, {'message': 'Injected error.'}
+                    else:
+                        try:
+                            status, content = server.route(self.command, path, fields, body)
+                        except (KeyError, ValueError, TypeError) as e:
+                            status, content = 400, {'message': repr(e)}
+                        content = json.loads(json.dumps(content))
+                self.respond(status, content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', type=str, default='127.0.0.1', dest='host', help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=8000, dest='port', help='Port to listen on.')
+    parser.add_argument('--latency', type=float, default=0.0, dest='latency', help='Seconds added to each request.')
+    parser.add_argument('--bandwidth', type=float, default=None, dest='bandwidth',
+                        help='Upload bandwidth in MB/s shared by all requests.')
+    parser.add_argument('--error-rate', type=float, default=0.0, dest='error_rate',
+                        help='Probability of answering a request with status code 503.')
+    parser.add_argument('--seed', type=int, default=None, dest='seed', help='Seed of injected errors.')
+    options = parser.parse_args()
+
+    mock_server = MockPublishingServer(options.host, options.port, options.latency,
+                                       options.bandwidth * 1024 * 1024 if options.bandwidth else None,
+                                       options.error_rate, options.seed)
+    print(f'Mock Publishing API listening on {mock_server.url}, set it as "host" in config.json.')
+    try:
+        mock_server.server.serve_forever()
+    except KeyboardInterrupt:
+        mock_server.stop()